@@ -0,0 +1,112 @@
+import argparse
+import io
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import mido
+from mido import MidiFile, MidiTrack, Message
+
+from parse_cache import PARSE_CACHE
+
+# Offline config for AIComposer: nothing listens here, so every job takes the fallback path
+OFFLINE_COMPOSER_CONFIG = {
+    'endpoint': 'http://127.0.0.1:9/music',
+    'timeout': 1,
+    'model': 'deepseek-music-v1',
+    'max_tokens': 2000
+}
+
+MOODS = ['happy', 'sad', 'angry', 'calm', 'jazz', 'blues']
+
+def make_input(job_id, length=24):
+    """Build a distinct recording per job so each output can be checked against its input"""
+    rng = random.Random(job_id)
+    mid = MidiFile(ticks_per_beat=480)
+    track = MidiTrack()
+    mid.tracks.append(track)
+    # Job-specific signature pitches, then a random C-major line
+    pitches = [36 + job_id % 24, 84 + job_id % 12]
+    pitches += [rng.choice([60, 62, 64, 65, 67, 69, 71, 72]) for _ in range(length)]
+    for pitch in pitches:
+        track.append(Message('note_on', note=pitch, velocity=80, time=0))
+        track.append(Message('note_off', note=pitch, velocity=0, time=480))
+    buffer = io.BytesIO()
+    mid.save(file=buffer)
+    return buffer.getvalue()
+
+def pitches_of(data):
+    """Multiset of note-on pitches in MIDI bytes"""
+    return Counter(
+        msg.note for msg in MidiFile(file=io.BytesIO(data))
+        if msg.type == 'note_on' and msg.velocity > 0
+    )
+
+def tempo_of(data):
+    for msg in MidiFile(file=io.BytesIO(data)):
+        if msg.type == 'set_tempo':
+            return round(mido.tempo2bpm(msg.tempo))
+    return None
+
+def run_job(kind, job_id):
+    """Run one bytes-in/bytes-out job and return (job_id, output bytes)"""
+    if kind == 'melody':
+        from midi_generator import generate_from_bytes
+        return job_id, generate_from_bytes(make_input(job_id))
+    if kind == 'composer':
+        from midi_generator2 import compose_bytes
+        return job_id, compose_bytes(make_input(job_id), OFFLINE_COMPOSER_CONFIG)
+    from textToMidi import text_to_midi_bytes
+    return job_id, text_to_midi_bytes(MOODS[job_id % len(MOODS)])
+
+def check_isolation(kind, job_id, output):
+    """Each output must contain every note of its own input (text jobs: its own tempo)"""
+    if kind == 'text':
+        from textToMidi import interpret_mood
+        return tempo_of(output) == interpret_mood(MOODS[job_id % len(MOODS)])['tempo']
+    expected = pitches_of(make_input(job_id))
+    return not (expected - pitches_of(output))
+
+def disable_cache():
+    """Worker initializer: force every job to parse from scratch"""
+    PARSE_CACHE.cache_dir = None
+    PARSE_CACHE.clear()
+
+def run_batch(kind, jobs, workers, executor_cls, warm):
+    initializer = None if warm else disable_cache
+    start = time.perf_counter()
+    with executor_cls(max_workers=workers, initializer=initializer) as pool:
+        results = list(pool.map(run_job, [kind] * jobs, range(jobs)))
+    elapsed = time.perf_counter() - start
+    failures = [job_id for job_id, output in results if not check_isolation(kind, job_id, output)]
+    return elapsed, failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Run concurrent generation jobs and check isolation/throughput")
+    parser.add_argument('--kind', choices=['melody', 'composer', 'text'], default='melody')
+    parser.add_argument('--jobs', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--executor', choices=['process', 'thread'], default='process')
+    parser.add_argument('--warm', action='store_true',
+                        help="keep the parse cache enabled (the serial pass then warms it for the parallel one)")
+    args = parser.parse_args()
+
+    executor_cls = ProcessPoolExecutor if args.executor == 'process' else ThreadPoolExecutor
+    serial_time, serial_failures = run_batch(args.kind, args.jobs, 1, executor_cls, args.warm)
+    parallel_time, parallel_failures = run_batch(args.kind, args.jobs, args.workers, executor_cls, args.warm)
+
+    print(f"{args.kind} x{args.jobs} ({args.executor})")
+    print(f"  1 worker:  {serial_time:.2f}s  {args.jobs / serial_time:.1f} jobs/s")
+    print(f"  {args.workers} workers: {parallel_time:.2f}s  {args.jobs / parallel_time:.1f} jobs/s"
+          f"  speedup {serial_time / parallel_time:.2f}x")
+
+    failures = sorted(set(serial_failures + parallel_failures))
+    if failures:
+        print(f"Isolation check failed for jobs: {failures}")
+        sys.exit(1)
+    print("  isolation: ok")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import numpy as np
+
+PERCENTILES = [50, 90, 99, 99.9]
+
+def note_events(session_id, count):
+    """Random in-key note events for one simulated player"""
+    rng = random.Random(session_id)
+    scale = [60, 62, 64, 65, 67, 69, 71, 72]
+    return [
+        {'type': 'note', 'id': i, 'pitch': rng.choice(scale), 'duration': rng.choice([0.25, 0.5, 1.0]), 'count': 4}
+        for i in range(count)
+    ]
+
+def report(label, samples_ms):
+    """Print latency percentiles and return them for the results file"""
+    samples = np.array(samples_ms)
+    summary = {f"p{p}": float(np.percentile(samples, p)) for p in PERCENTILES}
+    summary['max'] = float(samples.max())
+    summary['n'] = len(samples)
+    values = '  '.join(f"p{p}={summary[f'p{p}']:.3f}ms" for p in PERCENTILES)
+    print(f"  {label}: n={len(samples)}  {values}  max={summary['max']:.3f}ms")
+    return summary
+
+def run_inprocess(sessions, events):
+    """Per-event compute latency of LiveMelodyState with no network in the way"""
+    from midi_generator import LiveMelodyState
+
+    latencies = []
+    for session_id in range(sessions):
+        state = LiveMelodyState()
+        for event in note_events(session_id, events):
+            start = time.perf_counter()
+            state.add_note(event['pitch'], event['duration'])
+            state.predict(event['count'])
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    print(f"in-process: {sessions} sessions x {events} events")
+    return {'mode': 'inprocess', 'sessions': sessions, 'events': events, 'compute_ms': report("compute", latencies)}
+
+async def play_session(url, session_id, events, round_trips, compute):
+    import websockets
+
+    async with websockets.connect(url) as ws:
+        for event in note_events(session_id, events):
+            start = time.perf_counter()
+            await ws.send(json.dumps(event))
+            reply = json.loads(await ws.recv())
+            round_trips.append((time.perf_counter() - start) * 1000)
+            if reply.get('type') == 'prediction':
+                compute.append(reply['compute_ms'])
+
+async def run_websocket(url, sessions, events):
+    """Concurrent players against a running live_server, recording round-trip and server latency"""
+    round_trips = []
+    compute = []
+    start = time.perf_counter()
+    await asyncio.gather(*(play_session(url, i, events, round_trips, compute) for i in range(sessions)))
+    elapsed = time.perf_counter() - start
+
+    print(f"websocket: {url}  {sessions} sessions x {events} events  {len(round_trips) / elapsed:.0f} events/s")
+    return {
+        'mode': 'websocket', 'url': url, 'sessions': sessions, 'events': events,
+        'events_per_s': len(round_trips) / elapsed,
+        'round_trip_ms': report("round trip", round_trips),
+        'compute_ms': report("server compute", compute)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the live continuation WebSocket")
+    parser.add_argument('--url', default='ws://localhost:8001/ws/continue')
+    parser.add_argument('--sessions', type=int, default=16)
+    parser.add_argument('--events', type=int, default=500)
+    parser.add_argument('--inprocess', action='store_true', help="benchmark LiveMelodyState directly, without a server")
+    parser.add_argument('--output', help="write the recorded latency percentiles to this JSON file")
+    args = parser.parse_args()
+
+    if args.inprocess:
+        results = run_inprocess(args.sessions, args.events)
+    else:
+        results = asyncio.run(run_websocket(args.url, args.sessions, args.events))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
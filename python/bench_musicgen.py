@@ -0,0 +1,148 @@
+import argparse
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from musicgen_cpu import CPU_MODES
+
+def tiny_model():
+    """Small randomly initialised MusicGen, so the benchmark runs offline"""
+    from transformers import EncodecConfig, MusicgenConfig, MusicgenDecoderConfig, MusicgenForConditionalGeneration, T5Config
+
+    text_encoder = T5Config(vocab_size=1000, d_model=128, d_kv=32, d_ff=256, num_layers=2, num_heads=4)
+    # The decoder samples codes in [0, vocab_size), which EnCodec must be able to look up
+    audio_encoder = EncodecConfig(codebook_size=1024)
+    # pad/bos sit one past the codebook, as in the released checkpoints (2048 for 2048 codes)
+    codes = audio_encoder.codebook_size
+    decoder = MusicgenDecoderConfig(vocab_size=codes, pad_token_id=codes, bos_token_id=codes, hidden_size=256,
+                                    ffn_dim=1024, num_hidden_layers=4, num_attention_heads=4, num_codebooks=4)
+    # Sub-configs as dicts, which every transformers version accepts
+    config = MusicgenConfig(text_encoder=text_encoder.to_dict(), audio_encoder=audio_encoder.to_dict(),
+                            decoder=decoder.to_dict())
+    return MusicgenForConditionalGeneration(config)
+
+class TinyProcessor:
+    """Character-level stand-in for MusicgenProcessor's tokenizer that matches tiny_model's vocabulary"""
+    def __call__(self, text, padding=True, return_tensors='pt'):
+        import torch
+        from transformers import BatchEncoding
+
+        width = max(len(t) for t in text)
+        ids = torch.zeros((len(text), width), dtype=torch.long)
+        mask = torch.zeros_like(ids)
+        for row, t in enumerate(text):
+            ids[row, :len(t)] = torch.tensor([ord(c) % 999 + 1 for c in t])
+            mask[row, :len(t)] = 1
+        return BatchEncoding({'input_ids': ids, 'attention_mask': mask})
+
+def check_prompt_cache(model_name, new_tokens):
+    """Generate with and without PromptEncodingCache and check the outputs and hit/miss counts agree"""
+    import torch
+    from transformers import AutoProcessor, MusicgenForConditionalGeneration
+    from prompt_cache import PromptEncodingCache
+
+    if model_name == 'tiny':
+        model, processor = tiny_model(), TinyProcessor()
+    else:
+        model = MusicgenForConditionalGeneration.from_pretrained(model_name)
+        processor = AutoProcessor.from_pretrained(model_name)
+    model.eval()
+    cache = PromptEncodingCache()
+    prompt = "lofi hip hop beat in C major"
+
+    def generate(inputs):
+        torch.manual_seed(0)
+        with torch.inference_mode():
+            return model.generate(**inputs, do_sample=True, guidance_scale=3, max_new_tokens=new_tokens)
+
+    reference = generate(dict(processor(text=[prompt], padding=True, return_tensors="pt")))
+    # The first call misses and runs the text encoder, the second is served from the cache
+    outputs = [generate(cache.encode(model, processor, prompt, guidance_scale=3)) for _ in range(2)]
+    stats = cache.stats()
+    return {
+        'matches': all(torch.equal(reference, output) for output in outputs),
+        'counts_ok': stats['hits'] == 1 and stats['misses'] == 1,
+        **stats
+    }
+
+def run_mode(mode, model_name, new_tokens, batch_size, repeats, workers):
+    """Benchmark one mode; runs in its own process so peak RSS is per mode"""
+    import torch
+    from transformers import MusicgenForConditionalGeneration
+    from musicgen_cpu import prepare_model
+
+    torch.manual_seed(0)
+    model = tiny_model() if model_name == 'tiny' else MusicgenForConditionalGeneration.from_pretrained(model_name)
+    model = prepare_model(model, mode, workers)
+
+    vocab_size = model.config.text_encoder.vocab_size
+    input_ids = torch.randint(1, vocab_size, (batch_size, 12))
+    attention_mask = torch.ones_like(input_ids)
+
+    # Time the EnCodec decode separately so the decoder's token rate can be reported on its own
+    audio_decode = model.audio_encoder.decode
+    decode_time = [0.0]
+
+    def timed_decode(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return audio_decode(*args, **kwargs)
+        finally:
+            decode_time[0] += time.perf_counter() - start
+
+    model.audio_encoder.decode = timed_decode
+
+    def generate():
+        with torch.inference_mode():
+            model.generate(input_ids=input_ids, attention_mask=attention_mask, do_sample=True,
+                           guidance_scale=3, max_new_tokens=new_tokens)
+
+    # Warm-up run (also triggers compilation in the compile mode)
+    generate()
+    decode_time[0] = 0.0
+    start = time.perf_counter()
+    for _ in range(repeats):
+        generate()
+    elapsed = time.perf_counter() - start
+    tokens = new_tokens * batch_size * repeats
+
+    return {
+        'mode': mode,
+        'threads': torch.get_num_threads(),
+        # End-to-end includes the text encoder and the EnCodec audio decode
+        'end_to_end_tokens_per_s': tokens / elapsed,
+        'decoder_tokens_per_s': tokens / (elapsed - decode_time[0]),
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MusicGen CPU inference modes")
+    parser.add_argument('--model', default='tiny', help="'tiny' (offline random config) or a Hugging Face model name")
+    parser.add_argument('--modes', nargs='+', choices=CPU_MODES, default=CPU_MODES)
+    parser.add_argument('--new-tokens', type=int, default=256)
+    parser.add_argument('--batch-size', type=int, default=1)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=1, help="worker processes the cores are shared between")
+    parser.add_argument('--skip-prompt-cache', action='store_true', help="skip the prompt cache hit/miss check")
+    args = parser.parse_args()
+
+    print(f"{'mode':<14}{'threads':>8}{'e2e tok/s':>12}{'decoder tok/s':>15}{'peak RSS':>12}")
+    for mode in args.modes:
+        # A fresh process per mode keeps peak RSS and thread settings independent
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+            result = pool.submit(run_mode, mode, args.model, args.new_tokens, args.batch_size,
+                                 args.repeats, args.workers).result()
+        print(f"{result['mode']:<14}{result['threads']:>8}{result['end_to_end_tokens_per_s']:>12.1f}"
+              f"{result['decoder_tokens_per_s']:>15.1f}{result['peak_rss_mb']:>10.0f}MB")
+
+    if not args.skip_prompt_cache:
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+            check = pool.submit(check_prompt_cache, args.model, min(args.new_tokens, 32)).result()
+        print(f"prompt cache: hits={check['hits']} misses={check['misses']} "
+              f"output matches uncached: {'yes' if check['matches'] else 'NO'}")
+        if not (check['matches'] and check['counts_ok']):
+            raise SystemExit("prompt cache check failed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import argparse
+import io
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from mido import MidiFile, MidiTrack, Message
+
+from midi_generator import MelodyGenerator
+
+# (register, chord size) per track: bass, melody, chords, then extra melodies
+VOICE_LAYOUT = [(36, 1), (67, 1), (55, 3), (72, 1), (60, 1), (79, 1), (48, 1), (84, 1)]
+
+def make_input(voices, notes_per_voice=64):
+    """Multi-track C-major recording with one track per voice"""
+    rng = random.Random(voices)
+    mid = MidiFile(ticks_per_beat=480)
+    for register, size in VOICE_LAYOUT[:voices]:
+        track = MidiTrack()
+        mid.tracks.append(track)
+        for _ in range(notes_per_voice):
+            root = register + rng.choice([0, 2, 4, 5, 7, 9, 11])
+            chord_tones = [root + step for step in (0, 4, 7)[:size]]
+            for pitch in chord_tones:
+                track.append(Message('note_on', note=pitch, velocity=80, time=0))
+            for i, pitch in enumerate(chord_tones):
+                track.append(Message('note_off', note=pitch, velocity=0, time=480 if i == 0 else 0))
+    buffer = io.BytesIO()
+    mid.save(file=buffer)
+    return buffer.getvalue()
+
+def main():
+    parser = argparse.ArgumentParser(description="Wall time of multi-voice generation for 1..N voices")
+    parser.add_argument('--max-voices', type=int, default=4)
+    parser.add_argument('--bars', type=int, default=64)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    with ProcessPoolExecutor(max_workers=args.max_voices) as pool:
+        # Start the workers up front so process start-up is not counted
+        list(pool.map(abs, range(args.max_voices)))
+
+        baseline = None
+        for count in range(1, args.max_voices + 1):
+            generator = MelodyGenerator(order=2, max_leap=4)
+            voices, bar_length = generator.parse_voices_bytes(make_input(count))
+            start = time.perf_counter()
+            for _ in range(args.repeats):
+                generator.generate_voices(voices, args.bars, bar_length, executor=pool)
+            elapsed = (time.perf_counter() - start) / args.repeats
+            baseline = baseline or elapsed
+            kinds = ', '.join(v['kind'] for v in voices)
+            print(f"{count} voice(s) [{kinds}]: {elapsed * 1000:.1f}ms  ({elapsed / baseline:.2f}x one voice)")
+
+if __name__ == "__main__":
+    main()
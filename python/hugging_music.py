@@ -1,22 +1,27 @@
 from fastapi import FastAPI, Form
 from fastapi.responses import FileResponse
-from transformers import MusicgenForConditionalGeneration, AutoProcessor
 import torch
 import tempfile
 import torchaudio
 from basic_pitch.inference import predict_and_save # type: ignore
+from musicgen_cpu import load_musicgen
+from prompt_cache import PROMPT_CACHE
 
 app = FastAPI()
 
-# Load the model and processor
-processor = AutoProcessor.from_pretrained("facebook/musicgen-medium")
-model = MusicgenForConditionalGeneration.from_pretrained("facebook/musicgen-medium")
-model = model.to("cuda" if torch.cuda.is_available() else "cpu")
+# Load the model and processor (CPU mode is picked via MUSICGEN_CPU_MODE when there is no GPU)
+model, processor = load_musicgen("facebook/musicgen-medium")
+
+@app.get("/prompt_cache/")
+async def prompt_cache_stats():
+    return PROMPT_CACHE.stats()
 
 @app.post("/generate_music/")
 async def generate_music(text: str = Form(...)):
-    inputs = processor(text=[text], return_tensors="pt").to(model.device)
-    audio_values = model.generate(**inputs, max_new_tokens=512)  # Adjust token length as needed
+    # Cached tokens and encoder outputs; the encoder only runs for new prompts
+    inputs = PROMPT_CACHE.encode(model, processor, text, model.generation_config.guidance_scale)
+    with torch.inference_mode():
+        audio_values = model.generate(**inputs, max_new_tokens=512)  # Adjust token length as needed
 
     # Save WAV file
     temp_audio_path = tempfile.NamedTemporaryFile(suffix=".wav", delete=False).name
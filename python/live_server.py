@@ -0,0 +1,70 @@
+import time
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from midi_generator import MelodyGenerator, LiveMelodyState
+
+app = FastAPI()
+
+# Upper bound on predicted notes per event, so one client can't stall the event loop
+MAX_PREDICTION = 16
+
+def new_state():
+    return LiveMelodyState(MelodyGenerator(order=2, chord_interval=4, max_leap=4))
+
+@app.websocket("/ws/continue")
+async def continue_melody(websocket: WebSocket):
+    """Live continuation: each note event updates the session state and returns predicted next notes.
+
+    Events are JSON objects: {"type": "note", "pitch": 60, "duration": 0.5, "count": 4, "id": ...}
+    or {"type": "reset"}. Durations are in quarter notes and ``count`` is capped at
+    MAX_PREDICTION. Malformed events get an error reply and leave the session untouched.
+    """
+    await websocket.accept()
+    state = new_state()
+    try:
+        while True:
+            try:
+                event = await websocket.receive_json()
+                if not isinstance(event, dict):
+                    raise ValueError("expected a JSON object")
+            except (KeyError, ValueError) as e:
+                # Bad JSON raises JSONDecodeError (a ValueError); a binary frame has no 'text' (KeyError)
+                await websocket.send_json({'type': 'error', 'id': None, 'error': f"Invalid message: {str(e)}"})
+                continue
+
+            if event.get('type') == 'reset':
+                state = new_state()
+                await websocket.send_json({'type': 'reset', 'id': event.get('id')})
+                continue
+
+            start = time.perf_counter()
+            # Validate the whole event before touching the session state
+            try:
+                pitch = int(event['pitch'])
+                duration = float(event.get('duration', 0.5))
+                count = int(event.get('count', 4))
+                if not 0 <= pitch <= 127:
+                    raise ValueError(f"pitch {pitch} outside 0-127")
+                if not 0 < duration <= 64:
+                    raise ValueError(f"duration {duration} outside (0, 64]")
+                if count < 0:
+                    raise ValueError(f"negative count {count}")
+            except (KeyError, TypeError, ValueError) as e:
+                await websocket.send_json({'type': 'error', 'id': event.get('id'), 'error': f"Invalid note event: {str(e)}"})
+                continue
+
+            state.add_note(pitch, duration)
+            notes = state.predict(min(count, MAX_PREDICTION))
+
+            await websocket.send_json({
+                'type': 'prediction',
+                'id': event.get('id'),
+                'key': state.key_name,
+                'notes': notes,
+                'compute_ms': (time.perf_counter() - start) * 1000
+            })
+    except WebSocketDisconnect:
+        pass
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=8001)
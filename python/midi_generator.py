@@ -1,8 +1,11 @@
 import numpy as np
 import os
 import random
+import sys
 from collections import defaultdict
-from music21 import converter, instrument, note, chord, stream, tempo, scale
+from concurrent.futures import ProcessPoolExecutor
+from music21 import converter, instrument, note, chord, stream, tempo, scale, key, midi, meter
+from parse_cache import PARSE_CACHE
 
 class MelodyGenerator:
     def __init__(self, order=2, chord_interval=4, max_leap=5):
@@ -12,37 +15,94 @@ class MelodyGenerator:
         self.scale_pitches = []
         self.scale_degrees = []
         self.current_key = None
+        self.tempo_marks = []
+        self.time_signatures = []
 
     def parse_midi(self, midi_path):
         """Parse MIDI with enhanced scale analysis"""
         try:
-            midi_stream = converter.parse(midi_path)
-            self.current_key = midi_stream.analyze('key')
-            print(f"Detected key: {self.current_key.tonic.name} {self.current_key.mode}")
-            
-            # Get scale properties
-            self.scale_pitches = [p.midi for p in self.current_key.getPitches()]
-            self.scale_degrees = list(range(1, 8))  # 1-7 scale degrees
-            
-            elements = midi_stream.flatten().elements
-            notes = []
-            current_chord = []
-            
-            for element in elements:
-                if isinstance(element, note.Note):
-                    notes.append({
-                        'pitch': element.pitch.midi,
-                        'degree': self._get_scale_degree(element),
-                        'duration': element.duration.quarterLength,
-                        'offset': element.offset
-                    })
-                elif isinstance(element, chord.Chord):
-                    current_chord = [p.midi for p in element.pitches]
-            
-            return notes, current_chord, midi_stream
+            with open(midi_path, 'rb') as f:
+                data = f.read()
+        except OSError as e:
+            raise RuntimeError(f"MIDI parsing failed: {str(e)}")
+        return self.parse_midi_bytes(data)
+
+    def parse_midi_bytes(self, data):
+        """Parse in-memory MIDI bytes (no shared input file)"""
+        try:
+            return self._restore(PARSE_CACHE.load('melody', data, self._analyze))
         except Exception as e:
             raise RuntimeError(f"MIDI parsing failed: {str(e)}")
 
+    def _analyze(self, data):
+        """Run the full music21 parse and key analysis, returning a cache record"""
+        midi_stream = converter.parseData(data, format='midi')
+        self.current_key = midi_stream.analyze('key')
+        self.scale_pitches = [p.midi for p in self.current_key.getPitches()]
+        self.scale_degrees = list(range(1, 8))
+
+        flat = midi_stream.flatten()
+        notes = []
+        current_chord = []
+        for element in flat.elements:
+            if isinstance(element, note.Note):
+                notes.append((element.pitch.midi, self._get_scale_degree(element),
+                              element.duration.quarterLength, element.offset))
+            elif isinstance(element, chord.Chord):
+                current_chord = [p.midi for p in element.pitches]
+
+        # Original note/chord events, needed to rebuild the stream for save_midi
+        events = list(flat.notes)
+        arrays = {
+            'note_pitch': np.array([n[0] for n in notes], dtype=np.int16),
+            'note_degree': np.array([n[1] for n in notes], dtype=np.int8),
+            'note_duration': np.array([n[2] for n in notes], dtype=np.float64),
+            'note_offset': np.array([n[3] for n in notes], dtype=np.float64),
+            'event_offset': np.array([e.offset for e in events], dtype=np.float64),
+            'event_duration': np.array([e.duration.quarterLength for e in events], dtype=np.float64),
+            'event_velocity': np.array([e.volume.velocity or 64 for e in events], dtype=np.int16),
+            'event_size': np.array([len(e.pitches) for e in events], dtype=np.int16),
+            'event_pitches': np.array([p.midi for e in events for p in e.pitches], dtype=np.int16),
+        }
+        meta = {
+            'key': {'tonic': self.current_key.tonic.name, 'mode': self.current_key.mode},
+            'tempo': [{'offset': float(m.offset), 'bpm': m.number}
+                      for m in flat.getElementsByClass(tempo.MetronomeMark)],
+            'chord': current_chord
+        }
+        return arrays, meta
+
+    def _restore(self, record):
+        """Rebuild notes, last chord and stream from a cached analysis record"""
+        arrays, meta = record
+        self._set_key(meta['key']['tonic'], meta['key']['mode'])
+        print(f"Detected key: {self.current_key.tonic.name} {self.current_key.mode}")
+
+        notes = [
+            {'pitch': p, 'degree': d, 'duration': q, 'offset': o}
+            for p, d, q, o in zip(arrays['note_pitch'].tolist(), arrays['note_degree'].tolist(),
+                                  arrays['note_duration'].tolist(), arrays['note_offset'].tolist())
+        ]
+
+        # Same layout converter.parse produces: a score wrapping a single part
+        part = stream.Part()
+        for mark in meta['tempo']:
+            part.insert(mark['offset'], tempo.MetronomeMark(number=mark['bpm']))
+        pitches = arrays['event_pitches'].tolist()
+        start = 0
+        for offset, duration, velocity, size in zip(arrays['event_offset'].tolist(), arrays['event_duration'].tolist(),
+                                                    arrays['event_velocity'].tolist(), arrays['event_size'].tolist()):
+            group = pitches[start:start + size]
+            start += size
+            elem = note.Note(group[0]) if size == 1 else chord.Chord(group)
+            elem.duration.quarterLength = duration
+            elem.volume.velocity = velocity
+            part.insert(offset, elem)
+        midi_stream = stream.Score()
+        midi_stream.insert(0, part)
+
+        return notes, list(meta['chord']), midi_stream
+
     def _get_scale_degree(self, element):
         """Get scale degree ensuring it stays within detected scale"""
         try:
@@ -54,7 +114,8 @@ class MelodyGenerator:
     def _nearest_scale_degree(self, pitch):
         """Find the nearest valid scale degree"""
         nearest_pitch = min(self.scale_pitches, key=lambda x: abs(x - pitch))
-        return self.scale_degrees[self.scale_pitches.index(nearest_pitch)]
+        # scale_pitches ends with the tonic an octave up, which is degree 1 again
+        return self.scale_degrees[self.scale_pitches.index(nearest_pitch) % len(self.scale_degrees)]
 
     def build_models(self, notes):
         """Build models with scale-constrained transitions"""
@@ -117,6 +178,10 @@ class MelodyGenerator:
         state = tuple([last_degree])
         return random.choice(model.get(state, self.scale_degrees))
 
+    def _next_scale_degree(self, model, state):
+        """Continue the degree model from the last ``order`` degrees, falling back to the scale"""
+        return random.choice(model.get(tuple(state[-self.order:])) or self.scale_degrees)
+
     def _degree_to_pitch(self, degree, last_degree):
         """Convert degree to pitch with voice leading constraints"""
         base_pitch = self.current_key.pitchFromDegree(degree).midi
@@ -139,6 +204,14 @@ class MelodyGenerator:
 
     def save_midi(self, original_stream, generated, output_path):
         """Save MIDI with scale validation"""
+        self._build_output(original_stream, generated).write('midi', fp=output_path)
+
+    def render_midi(self, original_stream, generated):
+        """Same as save_midi but returns the MIDI file as bytes"""
+        return midi.translate.streamToMidiFile(self._build_output(original_stream, generated)).writestr()
+
+    def _build_output(self, original_stream, generated):
+        """Combine the original stream with the generated notes"""
         output = stream.Stream()
         
         # Preserve original elements
@@ -168,8 +241,398 @@ class MelodyGenerator:
                 n.duration.quarterLength = note_data['duration']
                 output.insert(current_offset, n)
             current_offset += note_data['duration']
-        
-        output.write('midi', fp=output_path)
+
+        return output
+
+    def parse_voices_bytes(self, data):
+        """Parse MIDI bytes keeping each track/channel part as a separate voice"""
+        try:
+            return self._restore_voices(PARSE_CACHE.load('melody_voices', data, self._analyze_voices, version=2))
+        except Exception as e:
+            raise RuntimeError(f"MIDI parsing failed: {str(e)}")
+
+    def _analyze_voices(self, data):
+        """Per-part parse with key and meter analysis, returning a cache record"""
+        midi_stream = converter.parseData(data, format='midi')
+        self._set_key(*self._key_names(midi_stream.analyze('key')))
+
+        events = []
+        voices = []
+        for index, part in enumerate(midi_stream.parts):
+            # Instruments sit inside the part's measures after a MIDI import
+            part_instrument = part.recurse().getElementsByClass(instrument.Instrument).first()
+            voices.append({
+                'name': part.partName or f"Voice {index + 1}",
+                'program': part_instrument.midiProgram if part_instrument else None,
+                'channel': part_instrument.midiChannel if part_instrument else None
+            })
+            for element in part.flatten().notes:
+                # Unpitched drums (Unpitched, PercussionChord) have no scale degree; a
+                # drum-only part ends up empty and is dropped as a voice
+                if not isinstance(element, (note.Note, chord.Chord)) or not element.pitches:
+                    continue
+                root = element if isinstance(element, note.Note) else note.Note(element.root())
+                events.append((index, element, self._get_scale_degree(root)))
+
+        # Every part carries its own copy of the tempo and meter marks; keep one of each
+        flat = midi_stream.flatten()
+        tempo_map = list(dict.fromkeys(
+            (float(m.offset), m.number) for m in flat.getElementsByClass(tempo.MetronomeMark)))
+        signatures = list(dict.fromkeys(
+            (float(ts.offset), ts.ratioString) for ts in flat.getElementsByClass(meter.TimeSignature)))
+        arrays = {
+            'voice': np.array([v for v, _, _ in events], dtype=np.int16),
+            'degree': np.array([d for _, _, d in events], dtype=np.int8),
+            'offset': np.array([e.offset for _, e, _ in events], dtype=np.float64),
+            'duration': np.array([e.duration.quarterLength for _, e, _ in events], dtype=np.float64),
+            'velocity': np.array([e.volume.velocity or 64 for _, e, _ in events], dtype=np.int16),
+            'size': np.array([len(e.pitches) for _, e, _ in events], dtype=np.int16),
+            'pitches': np.array([p.midi for _, e, _ in events for p in e.pitches], dtype=np.int16),
+        }
+        meta = {
+            'key': dict(zip(('tonic', 'mode'), self._key_names(self.current_key))),
+            'bar_length': float(meter.TimeSignature(signatures[0][1]).barDuration.quarterLength) if signatures else 4.0,
+            'tempo': [{'offset': offset, 'bpm': bpm} for offset, bpm in tempo_map],
+            'meter': [{'offset': offset, 'ratio': ratio} for offset, ratio in signatures],
+            'voices': voices
+        }
+        return arrays, meta
+
+    def _restore_voices(self, record):
+        """Rebuild per-voice note lists from a cached record and classify each voice"""
+        arrays, meta = record
+        self._set_key(meta['key']['tonic'], meta['key']['mode'])
+        # Kept for render_voices, like the key
+        self.tempo_marks = [dict(m) for m in meta['tempo']]
+        self.time_signatures = [dict(ts) for ts in meta['meter']]
+
+        voices = [dict(v, notes=[]) for v in meta['voices']]
+        pitches = arrays['pitches'].tolist()
+        start = 0
+        for voice, degree, offset, duration, velocity, size in zip(
+                arrays['voice'].tolist(), arrays['degree'].tolist(), arrays['offset'].tolist(),
+                arrays['duration'].tolist(), arrays['velocity'].tolist(), arrays['size'].tolist()):
+            voices[voice]['notes'].append({
+                'pitches': pitches[start:start + size],
+                'pitch': pitches[start],
+                'degree': degree,
+                'duration': duration,
+                'offset': offset,
+                'velocity': velocity
+            })
+            start += size
+
+        voices = [v for v in voices if v['notes']]
+        if not voices:
+            raise ValueError("no notes found")
+        for v in voices:
+            v['register'] = round(np.mean([n['pitch'] for n in v['notes']]))
+            chord_ratio = np.mean([len(n['pitches']) > 1 for n in v['notes']])
+            v['kind'] = 'chords' if chord_ratio > 0.5 else 'melody'
+        lines = [v for v in voices if v['kind'] == 'melody']
+        if len(lines) > 1:
+            min(lines, key=lambda v: v['register'])['kind'] = 'bass'
+
+        return voices, meta['bar_length']
+
+    def plan_harmony(self, voices, bars, bar_length):
+        """Chord root degree for each generated bar, shared by every voice.
+
+        Learned from the bar-by-bar roots of the chord voice (or the bass, or
+        the first voice), so the voices can be generated independently and
+        still agree harmonically.
+        """
+        by_kind = {v['kind']: v for v in voices}
+        source = by_kind.get('chords') or by_kind.get('bass') or voices[0]
+
+        roots = {}
+        for n in source['notes']:
+            roots.setdefault(int(n['offset'] // bar_length), n['degree'])
+        roots = [roots[bar] for bar in sorted(roots)]
+
+        root_model = defaultdict(list)
+        for a, b in zip(roots, roots[1:]):
+            root_model[a].append(b)
+
+        plan = []
+        last_root = roots[-1] if roots else 1
+        for _ in range(bars):
+            last_root = random.choice(root_model.get(last_root) or [1, 4, 5])
+            plan.append(last_root)
+        return plan
+
+    def generate_voice(self, notes, harmony, bar_length, kind='melody', register=60):
+        """Generate one voice on the shared bar grid, one harmony root per bar"""
+        degree_model, duration_model = self.build_models(notes)
+        voice = []
+
+        last_degree = notes[-1]['degree'] if notes else harmony[0]
+        # States have the same lengths as the keys build_models uses
+        degree_state = tuple(n['degree'] for n in notes[-self.order:])
+        duration_state = tuple(n['duration'] for n in notes[-(self.order + 2):])
+
+        for bar, root in enumerate(harmony):
+            chord_degrees = [(root + step - 1) % 7 + 1 for step in (0, 2, 4)]
+            position = 0.0
+            while position < bar_length:
+                duration = self._generate_duration(duration_model, duration_state)
+                duration_state = tuple(list(duration_state[1:]) + [duration])
+                # Grace notes never advance the grid; notes are cut at the bar line
+                duration = min(max(duration, 0.25), bar_length - position)
+
+                if kind == 'chords':
+                    pitches = sorted(self._to_register(self._degree_to_pitch(d, d), register) for d in chord_degrees)
+                    voice.append({'pitches': pitches, 'duration': duration, 'offset': bar * bar_length + position})
+                else:
+                    if position == 0 or kind == 'bass':
+                        # Strong beats (and the whole bass line) land on chord tones
+                        degree = min(chord_degrees, key=lambda d: abs(d - last_degree))
+                    else:
+                        degree = self._next_scale_degree(degree_model, degree_state)
+                    pitch = self._to_register(self._degree_to_pitch(degree, last_degree), register)
+                    voice.append({'pitch': pitch, 'duration': duration, 'offset': bar * bar_length + position})
+                    last_degree = degree
+                    degree_state = (degree_state + (degree,))[-self.order:]
+
+                position += duration
+
+        return voice
+
+    def generate_voices(self, voices, bars=8, bar_length=4.0, executor=None):
+        """Generate every voice in parallel worker processes.
+
+        Pass a long-lived ``executor`` to avoid paying process start-up per call.
+        """
+        harmony = self.plan_harmony(voices, bars, bar_length)
+        tonic, mode = self._key_names(self.current_key)
+        jobs = [{
+            'order': self.order, 'max_leap': self.max_leap, 'tonic': tonic, 'mode': mode,
+            'notes': v['notes'], 'harmony': harmony, 'bar_length': bar_length,
+            'kind': v['kind'], 'register': v['register'], 'seed': random.getrandbits(32)
+        } for v in voices]
+
+        if executor is not None:
+            return list(executor.map(_generate_voice_job, jobs))
+        with ProcessPoolExecutor(max_workers=len(jobs)) as pool:
+            return list(pool.map(_generate_voice_job, jobs))
+
+    def render_voices(self, voices, generated, bar_length=4.0):
+        """Write original and generated notes as one MIDI track per voice"""
+        # Continuations start on the first bar line after the original material
+        end = max(n['offset'] + n['duration'] for v in voices for n in v['notes'])
+        start = -(-end // bar_length) * bar_length
+
+        score = stream.Score()
+        for v, continuation in zip(voices, generated):
+            part = stream.Part()
+            part.partName = v['name']
+            if v.get('program') is not None:
+                part_instrument = instrument.instrumentFromMidiProgram(v['program'])
+                part_instrument.midiChannel = v.get('channel')
+                part.insert(0, part_instrument)
+            for mark in self.tempo_marks:
+                part.insert(mark['offset'], tempo.MetronomeMark(number=mark['bpm']))
+            for ts in self.time_signatures:
+                part.insert(ts['offset'], meter.TimeSignature(ts['ratio']))
+            for n in v['notes']:
+                elem = note.Note(n['pitch']) if len(n['pitches']) == 1 else chord.Chord(n['pitches'])
+                elem.duration.quarterLength = n['duration']
+                elem.volume.velocity = n['velocity']
+                part.insert(n['offset'], elem)
+            for n in continuation:
+                elem = chord.Chord(n['pitches']) if 'pitches' in n else note.Note(n['pitch'])
+                elem.duration.quarterLength = n['duration']
+                part.insert(start + n['offset'], elem)
+            score.insert(0, part)
+        return midi.translate.streamToMidiFile(score).writestr()
+
+    def _set_key(self, tonic, mode):
+        """Set the working key and its scale properties"""
+        self.current_key = key.Key(tonic, mode)
+        self.scale_pitches = [p.midi for p in self.current_key.getPitches()]
+        self.scale_degrees = list(range(1, 8))  # 1-7 scale degrees
+
+    @staticmethod
+    def _key_names(key_obj):
+        return key_obj.tonic.name, key_obj.mode
+
+    @staticmethod
+    def _to_register(pitch, register):
+        """Move a pitch by octaves to sit closest to the voice's register"""
+        return pitch + 12 * round((register - pitch) / 12)
+
+def generate_from_bytes(data, length=50, order=2, chord_interval=4, max_leap=4):
+    """Bytes-in/bytes-out generation: continue the MIDI in ``data`` and return the result.
+
+    Each call uses its own MelodyGenerator, so concurrent jobs never share state
+    or files and can run freely across threads or processes.
+    """
+    generator = MelodyGenerator(order=order, chord_interval=chord_interval, max_leap=max_leap)
+    notes, chords, original_stream = generator.parse_midi_bytes(data)
+    generated_notes = generator.generate(notes, length=length)
+    return generator.render_midi(original_stream, generated_notes)
+
+def _generate_voice_job(job):
+    """Worker entry point for MelodyGenerator.generate_voices"""
+    random.seed(job['seed'])
+    generator = MelodyGenerator(order=job['order'], max_leap=job['max_leap'])
+    generator._set_key(job['tonic'], job['mode'])
+    return generator.generate_voice(job['notes'], job['harmony'], job['bar_length'], job['kind'], job['register'])
+
+def generate_voices_from_bytes(data, bars=8, order=2, max_leap=4, executor=None):
+    """Bytes-in/bytes-out multi-voice generation: one output track per input voice"""
+    generator = MelodyGenerator(order=order, max_leap=max_leap)
+    voices, bar_length = generator.parse_voices_bytes(data)
+    generated = generator.generate_voices(voices, bars, bar_length, executor)
+    return generator.render_voices(voices, generated, bar_length)
+
+# Aarden-Essen key profiles, the weights behind music21's analyze('key'), so the
+# live estimate agrees with parse_midi; and the scale steps music21 uses for each mode
+MAJOR_PROFILE = [17.7661, 0.145624, 14.9265, 0.160186, 19.8049, 11.3587,
+                 0.291248, 22.062, 0.145624, 8.15494, 0.232998, 4.95122]
+MINOR_PROFILE = [18.2648, 0.737619, 14.0499, 16.8599, 0.702494, 14.4362,
+                 0.702494, 18.6161, 4.56621, 1.93186, 7.37619, 1.75623]
+MAJOR_STEPS = [0, 2, 4, 5, 7, 9, 11]
+MINOR_STEPS = [0, 2, 3, 5, 7, 8, 10]
+TONIC_NAMES = ['C', 'C#', 'D', 'E-', 'E', 'F', 'F#', 'G', 'A-', 'A', 'B-', 'B']
+
+def _compile_key_tables():
+    """Precompute normalized profiles and degree/pitch lookups for all 24 keys"""
+    profiles = []
+    tables = []
+    for mode, profile, steps in (('major', MAJOR_PROFILE, MAJOR_STEPS), ('minor', MINOR_PROFILE, MINOR_STEPS)):
+        for tonic in range(12):
+            rotated = np.roll(profile, tonic)
+            profiles.append((rotated - rotated.mean()) / rotated.std())
+            # Same octave placement as key.Key.getPitches(): tonic in octave 4 up to the next tonic
+            pitches = [60 + tonic + step for step in steps] + [72 + tonic]
+            tables.append({
+                'name': f"{TONIC_NAMES[tonic]} {mode}",
+                'pitches': pitches,
+                'degree_of_pc': {pitch % 12: degree for degree, pitch in enumerate(pitches[:7], start=1)}
+            })
+    return np.array(profiles), tables
+
+KEY_PROFILES, KEY_TABLES = _compile_key_tables()
+
+class LiveMelodyState:
+    """Incremental MelodyGenerator context for real-time continuation.
+
+    Notes are fed one at a time; the key estimate, scale degrees and transition
+    models are updated in place so predicting the next notes needs no file I/O
+    and no music21 analysis. Predictions follow MelodyGenerator.generate.
+    """
+    def __init__(self, generator=None):
+        self.generator = generator or MelodyGenerator(order=2, chord_interval=4, max_leap=4)
+        self.generator.scale_degrees = list(range(1, 8))
+        self.histogram = np.zeros(12)
+        self.key_index = None
+        self.pitches = []
+        self.degrees = []
+        self.durations = []
+        self.degree_model = defaultdict(list)
+        self.duration_model = defaultdict(list)
+        self.all_durations = []
+
+    @property
+    def key_name(self):
+        return KEY_TABLES[self.key_index]['name'] if self.key_index is not None else None
+
+    def add_note(self, pitch, duration=1.0):
+        """Add a played note and update the key estimate and models"""
+        self.histogram[pitch % 12] += duration
+        self.pitches.append(pitch)
+        self.durations.append(duration)
+
+        key_index = self._estimate_key()
+        if key_index != self.key_index:
+            # Degrees are relative to the key, so a key change re-derives them
+            self.key_index = key_index
+            self.degrees = [self._degree(p) for p in self.pitches]
+            self.degree_model = defaultdict(list)
+            for i in range(len(self.degrees)):
+                self._add_degree_transition(i)
+        else:
+            self.degrees.append(self._degree(pitch))
+            self._add_degree_transition(len(self.degrees) - 1)
+        self._add_duration_transition(len(self.durations) - 1)
+
+    def predict(self, length=4):
+        """Predict the next notes from the current context"""
+        generator = self.generator
+        melody = []
+
+        last_degree = self.degrees[-1] if self.degrees else random.choice(generator.scale_degrees)
+        # States have the same lengths as the keys _add_*_transition record
+        degree_state = tuple(self.degrees[-generator.order:])
+        duration_state = tuple(self.durations[-(generator.order + 2):])
+
+        for _ in range(length):
+            duration = self._generate_duration(duration_state)
+            duration_state = duration_state[1:] + (duration,)
+
+            degree = generator._next_scale_degree(self.degree_model, degree_state)
+            degree_state = (degree_state + (degree,))[-generator.order:]
+            pitch = self._degree_to_pitch(degree, last_degree)
+
+            if random.random() < 0.2:
+                harmony_degree = generator._get_harmony_degree(degree)
+                harmony_pitch = self._degree_to_pitch(harmony_degree, degree)
+                melody.append({'pitches': sorted([pitch, harmony_pitch]), 'duration': duration})
+            else:
+                melody.append({'pitch': pitch, 'duration': duration})
+
+            last_degree = degree
+
+        return melody
+
+    def _estimate_key(self):
+        """Krumhansl-Schmuckler estimate from the duration-weighted pitch-class histogram"""
+        std = self.histogram.std()
+        if std == 0:
+            return self.key_index if self.key_index is not None else 0
+        scores = KEY_PROFILES @ ((self.histogram - self.histogram.mean()) / std)
+        return int(scores.argmax())
+
+    def _degree(self, pitch):
+        """Scale degree of a pitch, snapping out-of-scale pitches to the nearest scale tone"""
+        table = KEY_TABLES[self.key_index]
+        if pitch % 12 in table['degree_of_pc']:
+            return table['degree_of_pc'][pitch % 12]
+        nearest = min(range(8), key=lambda i: abs(table['pitches'][i] - pitch))
+        return nearest % 7 + 1
+
+    def _pitch_from_degree(self, degree):
+        octave, index = divmod(degree - 1, 7)
+        return KEY_TABLES[self.key_index]['pitches'][index] + 12 * octave
+
+    def _degree_to_pitch(self, degree, last_degree):
+        """Table-driven equivalent of MelodyGenerator._degree_to_pitch"""
+        base_pitch = self._pitch_from_degree(degree)
+        last_pitch = self._pitch_from_degree(last_degree)
+        if abs(base_pitch - last_pitch) > self.generator.max_leap:
+            direction = 1 if base_pitch > last_pitch else -1
+            return self._pitch_from_degree(last_degree + direction)
+        return base_pitch
+
+    def _generate_duration(self, state):
+        """MelodyGenerator._generate_duration without rescanning the model"""
+        if state in self.duration_model and self.duration_model[state]:
+            return random.choice(self.duration_model[state])
+        return random.choice(self.all_durations) if self.all_durations else 1.0
+
+    def _add_degree_transition(self, i):
+        """Incremental form of the degree loop in MelodyGenerator.build_models"""
+        order = self.generator.order
+        if i >= order:
+            self.degree_model[tuple(self.degrees[i - order:i])].append(self.degrees[i])
+
+    def _add_duration_transition(self, i):
+        """Incremental form of the duration loop in MelodyGenerator.build_models"""
+        span = self.generator.order + 2
+        if i >= span:
+            self.duration_model[tuple(self.durations[i - span:i])].append(self.durations[i])
+            self.all_durations.append(self.durations[i])
 
 if __name__ == "__main__":
     # Get the directory of this script
@@ -198,10 +661,18 @@ if __name__ == "__main__":
     
     # Process MIDI
     try:
-        notes, chords, original_stream = generator.parse_midi(input_path)
-        generated_notes = generator.generate(notes)
-        generator.save_midi(original_stream, generated_notes, output_path)
-        print(f"Successfully generated {len(generated_notes)} notes in {output_path}")
+        if '--voices' in sys.argv[1:]:
+            # Multi-voice mode: one generated track per input track/channel
+            with open(input_path, 'rb') as f:
+                data = f.read()
+            with open(output_path, 'wb') as f:
+                f.write(generate_voices_from_bytes(data, order=2, max_leap=4))
+            print(f"Successfully generated all voices in {output_path}")
+        else:
+            notes, chords, original_stream = generator.parse_midi(input_path)
+            generated_notes = generator.generate(notes)
+            generator.save_midi(original_stream, generated_notes, output_path)
+            print(f"Successfully generated {len(generated_notes)} notes in {output_path}")
     except Exception as e:
         print(f"Error processing MIDI: {str(e)}")
         exit(1)
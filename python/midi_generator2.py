@@ -1,4 +1,6 @@
 import argparse
+import copy
+import io
 import numpy as np
 import mido
 import requests
@@ -7,6 +9,7 @@ from mido import MidiFile, MidiTrack, Message, MetaMessage
 from collections import defaultdict
 from music21 import key, chord, stream, note
 import os
+from parse_cache import PARSE_CACHE
 
 # Configuration for AI-based music generation
 DEEPSEEK_CONFIG = {
@@ -18,8 +21,35 @@ DEEPSEEK_CONFIG = {
 
 class MidiProcessor:
     """Processes MIDI files and extracts musical data."""
-    def __init__(self, midi_path):
-        self.midi = MidiFile(midi_path)
+    def __init__(self, midi_path=None, data=None):
+        if data is None:
+            with open(midi_path, 'rb') as f:
+                data = f.read()
+        self.data = data
+        self.midi = None
+        self.analysis = None
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Creates a processor for in-memory MIDI bytes."""
+        return cls(data=data)
+
+    def parse(self):
+        """Parses a MIDI file and extracts notes, key, and tempo information."""
+        self.analysis = self._restore(self.load_record())
+        return self.analysis
+
+    def load_record(self):
+        """Returns the cached analysis record, parsing the bytes only on a miss."""
+        return PARSE_CACHE.load('ai_composer', self.data, self._analyze, version=2)
+
+    def _analyze(self, data):
+        """Runs the full parse and key detection, returning a cache record.
+
+        The record also holds the per-track note view render_midi needs, so
+        one mido parse serves both the analysis and the output step.
+        """
+        self.midi = MidiFile(file=io.BytesIO(data))
         self.analysis = {
             'notes': [],
             'chords': [],
@@ -27,17 +57,33 @@ class MidiProcessor:
             'tempo_changes': [],
             'metadata': {'ticks_per_beat': self.midi.ticks_per_beat, 'duration': self.midi.length}
         }
-    
-    def parse(self):
-        """Parses a MIDI file and extracts notes, key, and tempo information."""
+
         current_time = 0
         for track in self.midi.tracks:
             for msg in track:
                 current_time += msg.time
                 self._process_message(msg, current_time)
-        
-        self.analysis['key'] = self.detect_key()
-        return self.analysis
+
+        detected = self.detect_key()
+        arrays = notes_to_arrays(self.analysis['notes'])
+        arrays.update(notes_to_arrays(track_notes(self.midi), prefix='track_'))
+        return arrays, {
+            'key': {'tonic': detected.tonic.name, 'mode': detected.mode},
+            'tempo_changes': self.analysis['tempo_changes'],
+            'chords': self.analysis['chords'],
+            'metadata': self.analysis['metadata']
+        }
+
+    def _restore(self, record):
+        """Rebuilds the analysis dict from a cached record (copies, never the cached objects)."""
+        arrays, meta = record
+        return {
+            'notes': arrays_to_notes(arrays),
+            'chords': copy.deepcopy(meta['chords']),
+            'key': key.Key(meta['key']['tonic'], meta['key']['mode']),
+            'tempo_changes': copy.deepcopy(meta['tempo_changes']),
+            'metadata': dict(meta['metadata'])
+        }
 
     def detect_key(self):
         """Detects the key signature of the given melody using music21."""
@@ -141,10 +187,25 @@ class AIComposer:
         """Extracts the scale degrees while avoiding dissonances."""
         return [p.midi for p in key_obj.pitches if p.midi % 12 != key_obj.tonic.midi]
 
-def save_midi(input_midi_path, new_notes, output_path):
-    """Saves the original notes from input MIDI concatenated with the generated notes as a new MIDI file."""
-    # Load the input MIDI file to extract its notes
-    input_midi = MidiFile(input_midi_path)
+def notes_to_arrays(notes, prefix=''):
+    """Packs parsed note dicts into compact arrays; a missing duration is stored as -1."""
+    return {
+        prefix + 'note': np.array([n['note'] for n in notes], dtype=np.int16),
+        prefix + 'time': np.array([n['time'] for n in notes], dtype=np.int64),
+        prefix + 'velocity': np.array([n['velocity'] for n in notes], dtype=np.int16),
+        prefix + 'duration': np.array([-1 if n['duration'] is None else n['duration'] for n in notes], dtype=np.int64)
+    }
+
+def arrays_to_notes(arrays, prefix=''):
+    """Inverse of notes_to_arrays."""
+    return [
+        {'note': n, 'time': t, 'velocity': v, 'duration': None if d < 0 else d}
+        for n, t, v, d in zip(arrays[prefix + 'note'].tolist(), arrays[prefix + 'time'].tolist(),
+                              arrays[prefix + 'velocity'].tolist(), arrays[prefix + 'duration'].tolist())
+    ]
+
+def track_notes(input_midi):
+    """Extracts notes from a parsed MIDI file, restarting the clock on every track."""
     input_notes = []
 
     # Extract notes from the input MIDI file
@@ -166,6 +227,22 @@ def save_midi(input_midi_path, new_notes, output_path):
                         note['duration'] = current_time - note['time']
                         break
 
+    return input_notes
+
+def save_midi(input_midi_path, new_notes, output_path):
+    """Saves the original notes from input MIDI concatenated with the generated notes as a new MIDI file."""
+    with open(input_midi_path, 'rb') as f:
+        data = f.read()
+    with open(output_path, 'wb') as f:
+        f.write(render_midi(data, new_notes))
+    print(f"🎵 Saved concatenated MIDI file to {output_path}")
+
+def render_midi(data, new_notes):
+    """Returns the input MIDI bytes concatenated with the generated notes as MIDI bytes."""
+    # Load the input MIDI notes from the same cached record MidiProcessor.parse uses
+    arrays, _ = MidiProcessor.from_bytes(data).load_record()
+    input_notes = arrays_to_notes(arrays, prefix='track_')
+
     # Get the last time from the original input notes
     last_time = max(n['time'] for n in input_notes) if input_notes else 0
 
@@ -205,10 +282,15 @@ def save_midi(input_midi_path, new_notes, output_path):
         track.append(Message('note_off', note=note['note'], velocity=0, time=note['duration']))
         current_time = note['time']
 
-    # Save the concatenated MIDI file
-    mid.save(output_path)
-    print(f"🎵 Saved concatenated MIDI file to {output_path}")
+    buffer = io.BytesIO()
+    mid.save(file=buffer)
+    return buffer.getvalue()
 
+def compose_bytes(data, config=DEEPSEEK_CONFIG):
+    """Bytes-in/bytes-out job: analyze ``data``, compose a continuation and return MIDI bytes."""
+    analysis = MidiProcessor.from_bytes(data).parse()
+    continuation = AIComposer(config).generate(analysis)
+    return render_midi(data, continuation)
 
 
 if __name__ == "__main__":
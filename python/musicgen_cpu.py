@@ -0,0 +1,48 @@
+import os
+import torch
+from transformers import AutoProcessor, MusicgenForConditionalGeneration
+
+# CPU inference modes for MusicGen
+#   fp32:         plain eager model (the previous behaviour)
+#   int8:         dynamic int8 quantization of every nn.Linear
+#   int8-compile: int8 plus torch.compile on the decoder forward pass
+CPU_MODES = ['fp32', 'int8', 'int8-compile']
+
+# Selected per process, e.g. MUSICGEN_CPU_MODE=int8 MUSICGEN_WORKERS=4
+DEFAULT_CPU_MODE = os.environ.get('MUSICGEN_CPU_MODE', 'fp32')
+DEFAULT_WORKERS = int(os.environ.get('MUSICGEN_WORKERS', '1'))
+
+def configure_threads(workers=1):
+    """Split the cores between worker processes so they don't oversubscribe the CPU"""
+    threads = max(1, (os.cpu_count() or 1) // max(1, workers))
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Only allowed before any inter-op parallel work has started
+        pass
+    return threads
+
+def prepare_model(model, mode=DEFAULT_CPU_MODE, workers=DEFAULT_WORKERS):
+    """Apply a CPU inference mode to a loaded MusicGen model"""
+    if mode not in CPU_MODES:
+        raise ValueError(f"Unknown CPU mode {mode!r}, expected one of {CPU_MODES}")
+
+    configure_threads(workers)
+    model = model.to("cpu").eval()
+    # Keep the decoder's key/value cache on between generation steps
+    model.generation_config.use_cache = True
+
+    if mode.startswith('int8'):
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    if mode.endswith('compile'):
+        model.decoder.forward = torch.compile(model.decoder.forward, dynamic=True)
+    return model
+
+def load_musicgen(model_name, mode=DEFAULT_CPU_MODE, workers=DEFAULT_WORKERS):
+    """Load model and processor, using the CPU inference mode when no GPU is present"""
+    processor = AutoProcessor.from_pretrained(model_name)
+    model = MusicgenForConditionalGeneration.from_pretrained(model_name)
+    if torch.cuda.is_available():
+        return model.to("cuda").eval(), processor
+    return prepare_model(model, mode, workers), processor
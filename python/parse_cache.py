@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Bump when the on-disk record layout changes; parsers version their own
+# records through the ``version`` argument of ParseCache.load
+FORMAT_VERSION = 1
+
+# Shared across processes: every generator script that runs on the same
+# host reads and writes the same directory.
+DEFAULT_CACHE_DIR = os.environ.get(
+    'TUNETUAH_PARSE_CACHE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server', '.parse_cache')
+)
+
+class ParseCache:
+    """Caches MIDI analysis records keyed by the hash of the MIDI bytes.
+
+    A record is a pair ``(arrays, meta)``: a dict of numpy arrays holding the
+    note data and a JSON-serializable dict holding the key, tempo map, chords
+    and anything else the parser needs. Records live in a bounded in-memory
+    LRU backed by compressed ``.npz`` files on disk; the directory is pruned
+    to the ``max_files`` most recently used records.
+    """
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_entries=64, max_files=512):
+        self.cache_dir = os.path.abspath(cache_dir) if cache_dir else None
+        self.max_entries = max_entries
+        self.max_files = max_files
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(data):
+        """Content hash used as the cache key."""
+        return hashlib.sha256(data).hexdigest()
+
+    def load(self, namespace, data, parse, version=1):
+        """Return the record for ``data``, calling ``parse(data)`` on a miss.
+
+        ``version`` identifies the parser's record layout; bump it whenever
+        ``parse`` changes so stale records are no longer served.
+        """
+        entry = (f"{namespace}-v{FORMAT_VERSION}.{version}", self.digest(data))
+
+        with self._lock:
+            if entry in self._memory:
+                self._memory.move_to_end(entry)
+                return self._memory[entry]
+
+        record = self._read(entry)
+        if record is None:
+            record = parse(data)
+            self._write(entry, record)
+        self._remember(entry, record)
+        return record
+
+    def clear(self):
+        """Drop the in-memory entries (disk entries are left in place)."""
+        with self._lock:
+            self._memory.clear()
+
+    def _remember(self, entry, record):
+        with self._lock:
+            self._memory[entry] = record
+            self._memory.move_to_end(entry)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _path(self, entry):
+        namespace, digest = entry
+        return os.path.join(self.cache_dir, f"{namespace}-{digest}.npz")
+
+    def _read(self, entry):
+        """Load a record from disk, treating unreadable files as misses."""
+        if not self.cache_dir:
+            return None
+        path = self._path(entry)
+        try:
+            with np.load(path, allow_pickle=False) as archive:
+                arrays = {name: archive[name] for name in archive.files if name != '__meta__'}
+                meta = json.loads(str(archive['__meta__']))
+        except (OSError, KeyError, ValueError):
+            return None
+        try:
+            # Mark as recently used so pruning keeps it
+            os.utime(path)
+        except OSError:
+            pass
+        return arrays, meta
+
+    def _write(self, entry, record):
+        """Atomically persist a record so concurrent readers never see partial files."""
+        if not self.cache_dir:
+            return
+        arrays, meta = record
+        tmp_path = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix='.', suffix='.tmp', dir=self.cache_dir)
+            with os.fdopen(fd, 'wb') as f:
+                np.savez_compressed(f, __meta__=np.array(json.dumps(meta)), **arrays)
+            os.replace(tmp_path, self._path(entry))
+        except OSError as e:
+            print(f"Parse cache write failed: {str(e)}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._prune()
+
+    def _prune(self):
+        """Delete the least recently used records beyond ``max_files``."""
+        try:
+            paths = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                     if name.endswith('.npz')]
+        except OSError:
+            return
+        if len(paths) <= self.max_files:
+            return
+
+        def last_used(path):
+            try:
+                return os.path.getmtime(path)
+            except OSError:
+                return 0
+
+        paths.sort(key=last_used)
+        for path in paths[:len(paths) - self.max_files]:
+            try:
+                os.remove(path)
+            except OSError:
+                # Already removed by another process
+                pass
+
+# Process-wide cache used by the generator scripts
+PARSE_CACHE = ParseCache()
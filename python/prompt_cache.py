@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import OrderedDict
+
+import torch
+from transformers.modeling_outputs import BaseModelOutput
+
+class PromptEncodingCache:
+    """LRU cache of MusicGen text-encoder outputs keyed by model and prompt text.
+
+    ``encode`` returns keyword arguments for ``model.generate``: the prompt's
+    ``input_ids`` plus ready-made ``encoder_outputs`` and ``attention_mask``.
+    Because ``encoder_outputs`` is supplied, generate skips both tokenization
+    and the text encoder. With classifier-free guidance the cached entry
+    already holds the conditional and unconditional halves stacked the way
+    MusicGen expects. The unconditional half is all zeros and is precomputed
+    once per shape.
+    """
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._unconditional = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.time_saved = 0.0
+
+    def encode(self, model, processor, prompt, guidance_scale=None):
+        """Return cached generate() kwargs for ``prompt``, running the encoder on a miss"""
+        guided = guidance_scale is not None and guidance_scale > 1
+        entry = (id(model), model.name_or_path, prompt, guided)
+
+        with self._lock:
+            if entry in self._entries:
+                self._entries.move_to_end(entry)
+                kwargs, cost = self._entries[entry]
+                self.hits += 1
+                self.time_saved += cost
+                return dict(kwargs)
+
+        start = time.perf_counter()
+        inputs = processor(text=[prompt], padding=True, return_tensors="pt").to(model.device)
+        with torch.inference_mode():
+            hidden = model.text_encoder(
+                input_ids=inputs['input_ids'], attention_mask=inputs['attention_mask']
+            ).last_hidden_state
+        attention_mask = inputs['attention_mask']
+        if guided:
+            hidden = torch.cat([hidden, self._null(hidden)], dim=0)
+            attention_mask = torch.cat([attention_mask, self._null(attention_mask)], dim=0)
+        kwargs = {
+            'input_ids': inputs['input_ids'],
+            'attention_mask': attention_mask,
+            'encoder_outputs': BaseModelOutput(last_hidden_state=hidden)
+        }
+        cost = time.perf_counter() - start
+
+        with self._lock:
+            self.misses += 1
+            self._entries[entry] = (kwargs, cost)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return dict(kwargs)
+
+    def stats(self):
+        """Hit rate and encoder time saved so far"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'time_saved_s': self.time_saved
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._unconditional.clear()
+            self.hits = self.misses = 0
+            self.time_saved = 0.0
+
+    def _null(self, tensor):
+        """Precomputed unconditional (all-zero) counterpart of ``tensor``"""
+        shape = (tuple(tensor.shape), tensor.dtype, tensor.device)
+        with self._lock:
+            if shape not in self._unconditional:
+                self._unconditional[shape] = torch.zeros_like(tensor)
+            return self._unconditional[shape]
+
+# Process-wide cache shared by the MusicGen endpoints
+PROMPT_CACHE = PromptEncodingCache()
@@ -1,5 +1,6 @@
 import sys
 import os
+import io
 import random
 import mido
 from mido import MidiFile, MidiTrack, Message, MetaMessage
@@ -80,6 +81,26 @@ def generate_melody_from_text(text, length=16):
     
     return melody, params
 
+# ===================== MIDI OUTPUT =====================
+def text_to_midi_bytes(text):
+    """Generate a melody for the text description and return it as MIDI bytes"""
+    melody, params = generate_melody_from_text(text)
+
+    mid = MidiFile()
+    track = MidiTrack()
+    mid.tracks.append(track)
+    track.append(MetaMessage('set_tempo', tempo=mido.bpm2tempo(params['tempo'])))
+    
+    for note in melody:
+        track.append(Message('note_on', note=note['note'], 
+                         velocity=note['note'], time=0))
+        track.append(Message('note_off', note=note['note'], 
+                         velocity=0, time=note['duration']))
+    
+    buffer = io.BytesIO()
+    mid.save(file=buffer)
+    return buffer.getvalue()
+
 # ===================== MAIN INTERFACE =====================
 def main(input_file):
     try:
@@ -96,26 +117,14 @@ def main(input_file):
         print("Error: Empty input file")
         return
 
-    melody, params = generate_melody_from_text(user_input)
-    
     # Create output directory if needed
     output_dir = os.path.join(os.path.dirname(__file__), '..', 'server')
     os.makedirs(output_dir, exist_ok=True)
     
     # Save MIDI
-    mid = MidiFile()
-    track = MidiTrack()
-    mid.tracks.append(track)
-    track.append(MetaMessage('set_tempo', tempo=mido.bpm2tempo(params['tempo'])))
-    
-    for note in melody:
-        track.append(Message('note_on', note=note['note'], 
-                         velocity=note['note'], time=0))
-        track.append(Message('note_off', note=note['note'], 
-                         velocity=0, time=note['duration']))
-    
     output_path = os.path.join(output_dir, 'generated2.mid')
-    mid.save(output_path)
+    with open(output_path, 'wb') as f:
+        f.write(text_to_midi_bytes(user_input))
     print(f"Generated MIDI saved to {output_path}")
 
 if __name__ == "__main__":
@@ -1,4 +1,6 @@
 import argparse
+import copy
+import io
 import numpy as np
 import mido
 import torch
@@ -10,7 +12,9 @@ from fastapi import FastAPI, Form
 from fastapi.responses import FileResponse
 import tempfile
 import soundfile as sf
-from transformers import AutoProcessor, MusicgenForConditionalGeneration
+from parse_cache import PARSE_CACHE
+from prompt_cache import PROMPT_CACHE
+from musicgen_cpu import load_musicgen, DEFAULT_CPU_MODE, DEFAULT_WORKERS
 
 app = FastAPI()
 
@@ -18,13 +22,35 @@ app = FastAPI()
 MUSICGEN_CONFIG = {
     'model_name': 'facebook/musicgen-melody',
     'duration': 30,  # Duration in seconds
-    'sampling_rate': 44100
+    'sampling_rate': 44100,
+    'cpu_mode': DEFAULT_CPU_MODE,  # fp32 / int8 / int8-compile, used when no GPU is present
+    'workers': DEFAULT_WORKERS
 }
 
 class MidiProcessor:
     """Processes MIDI files and extracts musical data with improved parsing"""
-    def __init__(self, midi_path):
-        self.midi = MidiFile(midi_path)
+    def __init__(self, midi_path=None, data=None):
+        if data is None:
+            with open(midi_path, 'rb') as f:
+                data = f.read()
+        self.data = data
+        self.midi = None
+        self.analysis = None
+        self.active_notes = {}
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Create a processor for in-memory MIDI bytes"""
+        return cls(data=data)
+
+    def parse(self):
+        """Improved parsing with accurate timing and chord detection"""
+        self.analysis = self._restore(PARSE_CACHE.load('musicgen', self.data, self._analyze))
+        return self.analysis
+
+    def _analyze(self, data):
+        """Full parse, key and chord analysis, returned as a cache record"""
+        self.midi = MidiFile(file=io.BytesIO(data))
         self.analysis = {
             'notes': [],
             'chords': [],
@@ -37,17 +63,39 @@ class MidiProcessor:
         }
         self.active_notes = {}
 
-    def parse(self):
-        """Improved parsing with accurate timing and chord detection"""
         current_time = 0
         for track in self.midi.tracks:
             for msg in track:
                 current_time += msg.time
                 self._process_message(msg, current_time)
-       
-        self.analysis['key'] = self.detect_key()
+
+        detected = self.detect_key()
         self._detect_chords()
-        return self.analysis
+
+        notes = self.analysis['notes']
+        arrays = {
+            field: np.array([n[field] for n in notes], dtype=np.int64)
+            for field in ('note', 'start', 'end', 'duration', 'velocity')
+        }
+        return arrays, {
+            'key': {'tonic': detected.tonic.name, 'mode': detected.mode},
+            'tempo_changes': self.analysis['tempo_changes'],
+            'chords': self.analysis['chords'],
+            'metadata': self.analysis['metadata']
+        }
+
+    def _restore(self, record):
+        """Rebuild the analysis dict from a cached record (copies, never the cached objects)"""
+        arrays, meta = record
+        fields = ('note', 'start', 'end', 'duration', 'velocity')
+        columns = [arrays[field].tolist() for field in fields]
+        return {
+            'notes': [dict(zip(fields, values)) for values in zip(*columns)],
+            'chords': copy.deepcopy(meta['chords']),
+            'key': key.Key(meta['key']['tonic'], meta['key']['mode']),
+            'tempo_changes': copy.deepcopy(meta['tempo_changes']),
+            'metadata': dict(meta['metadata'])
+        }
 
     def _process_message(self, msg, time):
         """Handle MIDI messages with precise timing"""
@@ -110,10 +158,11 @@ class MusicGenComposer:
     """Handles music generation using MusicGen Melody model"""
     def __init__(self, config):
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        self.model = MusicgenForConditionalGeneration.from_pretrained(
-            config['model_name']
-        ).to(self.device)
-        self.processor = AutoProcessor.from_pretrained(config['model_name'])
+        self.model, self.processor = load_musicgen(
+            config['model_name'],
+            mode=config.get('cpu_mode', DEFAULT_CPU_MODE),
+            workers=config.get('workers', DEFAULT_WORKERS)
+        )
         self.config = config
 
     def generate(self, midi_path, analysis):
@@ -124,18 +173,20 @@ class MusicGenComposer:
         # Create text prompt from musical analysis
         prompt = self._create_prompt(analysis)
        
-        # Process inputs and generate
-        inputs = self.processor(
-            text=[prompt],
+        # Text side comes from the prompt cache (tokens and encoder outputs,
+        # including the unconditional half for guidance); only the audio is processed here
+        inputs = PROMPT_CACHE.encode(self.model, self.processor, prompt, guidance_scale=3)
+        audio_inputs = self.processor(
             audio=melody,
             sampling_rate=sr,
             padding=True,
             return_tensors="pt"
         ).to(self.device)
 
-        with torch.no_grad():
+        with torch.inference_mode():
             audio_values = self.model.generate(
                 **inputs,
+                **audio_inputs,
                 do_sample=True,
                 guidance_scale=3,
                 max_new_tokens=self.config['duration']*50
@@ -173,6 +224,19 @@ def save_output(audio_array, output_path, sr=44100):
     sf.write(output_path, audio_array, sr)
     print(f"🎵 Saved generated audio to {output_path}")
 
+_composer = None
+
+def get_composer():
+    """Shared composer, so the model (and its cached prompt encodings) outlive a request"""
+    global _composer
+    if _composer is None:
+        _composer = MusicGenComposer(MUSICGEN_CONFIG)
+    return _composer
+
+@app.get("/prompt_cache/")
+async def prompt_cache_stats():
+    return PROMPT_CACHE.stats()
+
 @app.post("/generate_music/")
 async def generate_music(text: str = Form(...)):
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -187,7 +251,7 @@ async def generate_music(text: str = Form(...)):
     analysis = processor.parse()
 
     # Generate continuation with MusicGen
-    composer = MusicGenComposer(MUSICGEN_CONFIG)
+    composer = get_composer()
     generated_audio = composer.generate(input_path, analysis)
 
     # Save final output
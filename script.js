@@ -280,11 +280,61 @@ document.addEventListener("DOMContentLoaded", () => {
         });
     }
 
+    // Live continuation: while recording, every note is streamed to the Python
+    // live server (python/live_server.py) and the predicted next notes are highlighted
+    const LIVE_URL = `ws://${window.location.hostname || "localhost"}:8001/ws/continue`;
+    let liveSocket = null;
+
+    function openLiveSocket() {
+        try {
+            liveSocket = new WebSocket(LIVE_URL);
+        } catch (error) {
+            console.error("Live continuation unavailable:", error);
+            liveSocket = null;
+            return;
+        }
+        liveSocket.onmessage = (message) => {
+            const data = JSON.parse(message.data);
+            if (data.type === "prediction") {
+                showPrediction(data.notes);
+            }
+        };
+        liveSocket.onerror = () => console.error("Live continuation socket error");
+    }
+
+    function closeLiveSocket() {
+        if (liveSocket) {
+            liveSocket.close();
+            liveSocket = null;
+        }
+        document.querySelectorAll(".key.predicted").forEach(el => el.classList.remove("predicted"));
+    }
+
+    function sendLiveNote(note) {
+        if (liveSocket && liveSocket.readyState === WebSocket.OPEN) {
+            // "8n" is half a quarter note
+            liveSocket.send(JSON.stringify({ type: "note", pitch: Tone.Frequency(note).toMidi(), duration: 0.5, count: 4 }));
+        }
+    }
+
+    function showPrediction(notes) {
+        document.querySelectorAll(".key.predicted").forEach(el => el.classList.remove("predicted"));
+        notes.forEach(n => {
+            const pitches = n.pitches || [n.pitch];
+            pitches.forEach(pitch => {
+                const name = Tone.Frequency(pitch, "midi").toNote();
+                const keyElement = document.querySelector(`.key[data-note="${name}"]`);
+                if (keyElement) keyElement.classList.add("predicted");
+            });
+        });
+    }
+
     function playSound(note) {
         synth.triggerAttackRelease(note, "8n");
         if (recording) {
             const time = Tone.now() - startTime;
             recordedNotes.push({ note, time });
+            sendLiveNote(note);
         }
     }
 
@@ -294,6 +344,7 @@ document.addEventListener("DOMContentLoaded", () => {
         Tone.Transport.stop();
         Tone.Transport.cancel();
         startTime = Tone.now();
+        openLiveSocket();
         recordButton.disabled = true;
         stopButton.disabled = false;
         generateButton.disabled = true;
@@ -306,6 +357,7 @@ document.addEventListener("DOMContentLoaded", () => {
 
     stopButton.addEventListener("click", () => {
         recording = false;
+        closeLiveSocket();
         recordButton.disabled = false;
         stopButton.disabled = true;
         playbackButton.disabled = recordedNotes.length === 0 ? true : false;